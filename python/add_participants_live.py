@@ -13,6 +13,9 @@ Usage:
 """
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import json
 import sys
 import os
 
@@ -20,12 +23,54 @@ from sqlalchemy import create_engine, text
 from werkzeug.security import generate_password_hash
 import yaml
 
+from seed_cache import load_seed_yaml
+
+# Prefer the libyaml C parser when PyYAML was built against it
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Tag resolution and construction for the dry-run event scanner, matching the
+# safe loaders above
+_resolver = yaml.resolver.Resolver()
+_constructor = yaml.constructor.SafeConstructor()
+
+# Statements are built once at import and reused by every call
+EXISTING_DATA_QUERY = text("""
+    SELECT 'u' AS kind, username AS name, NULL::integer AS id
+    FROM users WHERE role = 'participant'
+    UNION ALL
+    SELECT 'g', group_name, id FROM groups
+""")
+
+ADMIN_ID_QUERY = text("""
+    SELECT id FROM users WHERE role = 'admin' LIMIT 1
+""")
+
+INSERT_GROUPS_QUERY = text("""
+    INSERT INTO groups (group_name, description, created_by, campaign_start_date)
+    SELECT group_name, description, :created_by, COALESCE(campaign_start_date, CURRENT_DATE)
+    FROM json_to_recordset(CAST(:groups AS json))
+        AS x(group_name text, description text, campaign_start_date date)
+    RETURNING id, group_name
+""")
+
+INSERT_USERS_QUERY = text("""
+    INSERT INTO users (username, password_hash, role, is_active)
+    SELECT username, password_hash, 'participant', TRUE
+    FROM json_to_recordset(CAST(:rows AS json)) AS x(username text, password_hash text)
+    RETURNING id, username
+""")
+
+INSERT_USER_GROUPS_QUERY = text("""
+    INSERT INTO user_groups (user_id, group_id)
+    SELECT * FROM unnest(CAST(:user_ids AS integer[]), CAST(:group_ids AS integer[]))
+""")
+
 
 def load_config(config_path):
     """Load configuration from YAML file"""
     try:
         with open(config_path, 'r') as file:
-            return yaml.safe_load(file)
+            return yaml.load(file, Loader=Loader)
     except FileNotFoundError:
         print(f"Configuration file not found: {config_path}")
         return None
@@ -37,8 +82,7 @@ def load_config(config_path):
 def load_seed_file(seed_file_path):
     """Load seed file and extract participants"""
     try:
-        with open(seed_file_path, 'r') as f:
-            seed_data = yaml.safe_load(f)
+        seed_data = load_seed_yaml(seed_file_path)
         
         if 'participants' not in seed_data:
             print("Error: No participants section found in seed file")
@@ -57,6 +101,122 @@ def load_seed_file(seed_file_path):
         return None, None
 
 
+def _skip_node(events, event):
+    """Consume the remaining events of the YAML node started by event"""
+    if not isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+        return
+    
+    depth = 1
+    while depth:
+        event = next(events)
+        if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+            depth += 1
+        elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            depth -= 1
+
+
+def _scalar_value(event):
+    """Construct a scalar the way the full loader does, so e.g. 2024 is an int in both"""
+    tag = event.tag
+    if tag is None or tag == '!':
+        tag = _resolver.resolve(yaml.ScalarNode, event.value, event.implicit)
+    return _constructor.construct_document(yaml.ScalarNode(tag, event.value, style=event.style))
+
+
+def _read_value(events, event):
+    """Read a scalar (or a list of scalars) starting at event, skipping anything else"""
+    if isinstance(event, yaml.ScalarEvent):
+        return _scalar_value(event)
+    
+    if isinstance(event, yaml.SequenceStartEvent):
+        values = []
+        for item in events:
+            if isinstance(item, yaml.SequenceEndEvent):
+                break
+            if isinstance(item, yaml.ScalarEvent):
+                values.append(_scalar_value(item))
+            else:
+                _skip_node(events, item)
+        return values
+    
+    _skip_node(events, event)
+    return None
+
+
+def _read_records(events, fields):
+    """Read a sequence of mappings, keeping only the given fields of each"""
+    records = []
+    for item in events:
+        if isinstance(item, yaml.SequenceEndEvent):
+            break
+        if not isinstance(item, yaml.MappingStartEvent):
+            _skip_node(events, item)
+            continue
+        
+        record = {}
+        for key in events:
+            if isinstance(key, yaml.MappingEndEvent):
+                break
+            value = next(events)
+            if isinstance(key, yaml.ScalarEvent) and key.value in fields:
+                record[key.value] = _read_value(events, value)
+            else:
+                _skip_node(events, value)
+        records.append(record)
+    
+    return records
+
+
+def scan_seed_file(seed_file_path):
+    """
+    Extract participant usernames/groups and group names from a seed file
+    
+    Walks the YAML event stream instead of building the full document, so the
+    remaining participant fields are never turned into Python objects. Used for
+    dry runs, where only names are needed.
+    """
+    participants = None
+    groups_data = []
+    
+    try:
+        with open(seed_file_path, 'r') as f:
+            events = yaml.parse(f, Loader=Loader)
+            
+            # Advance to the top-level mapping
+            for event in events:
+                if isinstance(event, yaml.MappingStartEvent):
+                    break
+            else:
+                event = None
+            
+            if event is not None:
+                for key in events:
+                    if isinstance(key, yaml.MappingEndEvent):
+                        break
+                    value = next(events)
+                    name = key.value if isinstance(key, yaml.ScalarEvent) else None
+                    
+                    if name == 'participants' and isinstance(value, yaml.SequenceStartEvent):
+                        participants = _read_records(events, ('username', 'groups'))
+                    elif name == 'groups' and isinstance(value, yaml.SequenceStartEvent):
+                        groups_data = _read_records(events, ('name',))
+                    else:
+                        _skip_node(events, value)
+        
+        if participants is None:
+            print("Error: No participants section found in seed file")
+            return None, None
+        
+        return participants, groups_data
+        
+    except FileNotFoundError:
+        print(f"Error: Seed file not found: {seed_file_path}")
+        return None, None
+    except yaml.YAMLError as e:
+        print(f"Error parsing seed file: {e}")
+        return None, None
+
+
 def create_db_engine(args):
     """Create database engine from args and config"""
     if args.db_url:
@@ -93,17 +253,16 @@ def get_existing_data(engine):
     """Get existing participants and groups from database"""
     try:
         with engine.connect() as conn:
-            # Get existing participant usernames
-            result = conn.execute(text("""
-                SELECT username FROM users WHERE role = 'participant'
-            """))
-            existing_participants = {row[0] for row in result}
+            # Get existing participant usernames and groups with their IDs in one round-trip
+            result = conn.execute(EXISTING_DATA_QUERY)
             
-            # Get existing groups with their IDs
-            result = conn.execute(text("""
-                SELECT id, group_name FROM groups
-            """))
-            existing_groups = {row[1]: row[0] for row in result}
+            existing_participants = set()
+            existing_groups = {}
+            for row in result.mappings():
+                if row['kind'] == 'u':
+                    existing_participants.add(row['name'])
+                else:
+                    existing_groups[row['name']] = row['id']
             
             return existing_participants, existing_groups
             
@@ -112,18 +271,15 @@ def get_existing_data(engine):
         sys.exit(1)
 
 
-def filter_new_participants(seed_participants, existing_participants):
+def filter_new_participants(seed_participants, existing_participants, verbose=False):
     """Filter out participants that already exist in database"""
-    new_participants = []
-    existing_count = 0
+    new_participants = [p for p in seed_participants if p['username'] not in existing_participants]
+    existing_count = len(seed_participants) - len(new_participants)
     
-    for participant in seed_participants:
-        username = participant['username']
-        if username in existing_participants:
-            existing_count += 1
-            print(f"  ⏭️  Skipping {username} (already exists)")
-        else:
-            new_participants.append(participant)
+    if verbose:
+        for participant in seed_participants:
+            if participant['username'] in existing_participants:
+                print(f"  ⏭️  Skipping {participant['username']} (already exists)")
     
     print(f"Found {len(seed_participants)} participants in seed file")
     print(f"Skipping {existing_count} existing participants")
@@ -151,35 +307,35 @@ def create_missing_groups(engine, seed_groups_data, existing_groups):
     try:
         with engine.begin() as conn:
             # Get admin user ID for created_by field
-            admin_result = conn.execute(text("""
-                SELECT id FROM users WHERE role = 'admin' LIMIT 1
-            """))
+            admin_result = conn.execute(ADMIN_ID_QUERY)
             admin_id = admin_result.scalar()
             
             if not admin_id:
                 print("Error: No admin user found in database")
                 sys.exit(1)
             
-            for group_data in missing_groups:
-                group_name = group_data['name']
-                description = group_data.get('description', f'Participant group for {group_name}')
-                campaign_start_date = group_data.get('campaign_start_date', 'CURRENT_DATE')
-                
-                # Create group
-                result = conn.execute(text("""
-                    INSERT INTO groups (group_name, description, created_by, campaign_start_date)
-                    VALUES (:group_name, :description, :created_by, :campaign_start_date)
-                    RETURNING id
-                """), {
-                    'group_name': group_name,
-                    'description': description,
-                    'created_by': admin_id,
-                    'campaign_start_date': campaign_start_date
-                })
-                
-                group_id = result.scalar()
+            groups = [
+                {
+                    'group_name': group_data['name'],
+                    'description': group_data.get('description', f"Participant group for {group_data['name']}"),
+                    'campaign_start_date': group_data.get('campaign_start_date')
+                }
+                for group_data in missing_groups
+            ]
+            
+            # Create all groups in a single statement, defaulting the campaign start to today
+            result = conn.execute(INSERT_GROUPS_QUERY, {
+                'created_by': admin_id,
+                'groups': json.dumps(groups, default=str)
+            })
+            
+            log = []
+            for group_id, group_name in result:
                 existing_groups[group_name] = group_id
-                print(f"  ✓ Created group: {group_name}")
+                log.append(f"  ✓ Created group: {group_name}")
+        
+        # Report after commit so terminal output never extends the transaction
+        sys.stdout.write('\n'.join(log) + '\n')
         
         return existing_groups
         
@@ -188,7 +344,7 @@ def create_missing_groups(engine, seed_groups_data, existing_groups):
         sys.exit(1)
 
 
-def add_participants_to_database(engine, new_participants, existing_groups):
+def add_participants_to_database(engine, new_participants, existing_groups, hash_method=None):
     """Add new participants to the database using passwords from seed file"""
     if not new_participants:
         print("No new participants to add")
@@ -196,47 +352,65 @@ def add_participants_to_database(engine, new_participants, existing_groups):
     
     print(f"\nAdding {len(new_participants)} participants to database...")
     
+    # Resolve groups before touching the database
+    rows = []
+    append_row = rows.append
+    get_group_id = existing_groups.get
+    for participant in new_participants:
+        username = participant['username']
+        group_name = participant['groups']  # Note: 'groups' field in seed file
+        
+        group_id = get_group_id(group_name)
+        if group_id is None:
+            print(f"Error: Group '{group_name}' not found for participant {username}")
+            continue
+        
+        append_row({
+            'username': username,
+            'password': participant['password'],
+            'group_name': group_name,
+            'group_id': group_id
+        })
+    
+    if not rows:
+        print("No participants with a valid group to add")
+        return
+    
+    # Password hashing is deliberately CPU-heavy, so spread it over all cores
+    # and keep it out of the transaction
+    hash_password = generate_password_hash
+    if hash_method:
+        hash_password = partial(generate_password_hash, method=hash_method)
+    
+    with ProcessPoolExecutor() as executor:
+        password_hashes = executor.map(
+            hash_password, [row['password'] for row in rows], chunksize=8
+        )
+        for row, password_hash in zip(rows, password_hashes):
+            row['password_hash'] = password_hash
+    
     try:
         with engine.begin() as conn:
-            for participant in new_participants:
-                username = participant['username']
-                password = participant['password']
-                group_name = participant['groups']  # Note: 'groups' field in seed file
-                
-                # Hash the password from seed file
-                password_hash = generate_password_hash(password)
-                
-                # Get group ID
-                if group_name not in existing_groups:
-                    print(f"Error: Group '{group_name}' not found for participant {username}")
-                    continue
-                
-                group_id = existing_groups[group_name]
-                
-                # Insert user
-                user_result = conn.execute(text("""
-                    INSERT INTO users (username, password_hash, role, is_active)
-                    VALUES (:username, :password_hash, 'participant', TRUE)
-                    RETURNING id
-                """), {
-                    'username': username,
-                    'password_hash': password_hash
-                })
-                
-                user_id = user_result.scalar()
-                
-                # Add to group
-                conn.execute(text("""
-                    INSERT INTO user_groups (user_id, group_id)
-                    VALUES (:user_id, :group_id)
-                """), {
-                    'user_id': user_id,
-                    'group_id': group_id
-                })
-                
-                print(f"  ✓ Added {username} -> {group_name}")
+            # Insert all users in a single statement
+            user_result = conn.execute(INSERT_USERS_QUERY, {
+                'rows': json.dumps([
+                    {'username': row['username'], 'password_hash': row['password_hash']}
+                    for row in rows
+                ])
+            })
+            
+            user_ids = {username: user_id for user_id, username in user_result}
+            
+            # Add all users to their groups in a single statement
+            conn.execute(INSERT_USER_GROUPS_QUERY, {
+                'user_ids': [user_ids[row['username']] for row in rows],
+                'group_ids': [row['group_id'] for row in rows]
+            })
+        
+        # Report after commit so terminal output never extends the transaction
+        sys.stdout.write(''.join(f"  ✓ Added {row['username']} -> {row['group_name']}\n" for row in rows))
         
-        print(f"\n✅ Successfully added {len(new_participants)} participants!")
+        print(f"\n✅ Successfully added {len(rows)} participants!")
         
     except Exception as e:
         print(f"Error adding participants: {e}")
@@ -249,6 +423,8 @@ def main():
     parser.add_argument('--config', help='Path to configuration YAML file')
     parser.add_argument('--db-url', help='Database connection URL (overrides config)')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be done without making changes')
+    parser.add_argument('--verbose', '-v', action='store_true', help='List each skipped participant')
+    parser.add_argument('--hash-method', help='Password hash method passed to werkzeug (e.g. pbkdf2:sha256:100000)')
     
     args = parser.parse_args()
     
@@ -258,7 +434,11 @@ def main():
     
     # Load seed file
     print(f"Loading seed file: {args.seed_file}")
-    seed_participants, seed_groups = load_seed_file(args.seed_file)
+    if args.dry_run:
+        # Only usernames and group names are needed to report what would change
+        seed_participants, seed_groups = scan_seed_file(args.seed_file)
+    else:
+        seed_participants, seed_groups = load_seed_file(args.seed_file)
     if seed_participants is None:
         sys.exit(1)
     
@@ -280,7 +460,7 @@ def main():
     print(f"Found {len(existing_groups)} existing groups: {', '.join(existing_groups.keys())}")
     
     # Filter out existing participants
-    new_participants = filter_new_participants(seed_participants, existing_participants)
+    new_participants = filter_new_participants(seed_participants, existing_participants, args.verbose)
     
     if not new_participants:
         print("\n✅ All participants from seed file already exist in database")
@@ -304,7 +484,7 @@ def main():
     updated_groups = create_missing_groups(engine, seed_groups, existing_groups)
     
     # Add participants
-    add_participants_to_database(engine, new_participants, updated_groups)
+    add_participants_to_database(engine, new_participants, updated_groups, args.hash_method)
 
 
 if __name__ == '__main__':
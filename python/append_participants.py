@@ -19,26 +19,31 @@ CSV format:
 """
 
 import argparse
+from collections import Counter
 import csv
+import os
 import secrets
-import string
+import shutil
 import sys
 
 import yaml
 
+from seed_cache import load_seed_yaml
+
+# Prefer the libyaml C emitter when PyYAML was built against it
+Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 
 def generate_password(length=12):
     """Generate a secure random password"""
-    alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
-    password = ''.join(secrets.choice(alphabet) for _ in range(length))
-    return password
+    # One urandom read; URL-safe base64 gives 6 bits of entropy per character
+    return secrets.token_urlsafe(length)[:length]
 
 
 def load_seed_file(seed_file_path):
     """Load existing seed file"""
     try:
-        with open(seed_file_path, 'r') as f:
-            return yaml.safe_load(f)
+        return load_seed_yaml(seed_file_path)
     except FileNotFoundError:
         print(f"Error: Seed file not found: {seed_file_path}")
         sys.exit(1)
@@ -67,32 +72,37 @@ def get_existing_groups(seed_data):
 
 def get_next_participant_number(existing_ids):
     """Find the next available FOD number"""
-    numbers = []
-    for pid in existing_ids:
-        if pid.startswith('FOD') and len(pid) == 6 and pid[3:].isdigit():
-            numbers.append(int(pid[3:]))
-    
-    return max(numbers) + 1 if numbers else 1
+    return max(
+        (int(pid[3:]) for pid in existing_ids
+         if pid.startswith('FOD') and len(pid) == 6 and pid[3:].isdigit()),
+        default=0
+    ) + 1
 
 
 def read_participants_from_csv(csv_path):
     """Read participants from CSV file"""
-    participants = []
     try:
-        with open(csv_path, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Clean whitespace
-                participant_id = row['participant_id'].strip()
-                group = row['group'].strip()
-                participants.append({'id': participant_id, 'group': group})
+        with open(csv_path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            id_index = header.index('participant_id')
+            group_index = header.index('group')
+            
+            # Clean whitespace, skipping blank lines
+            participants = [
+                {'id': row[id_index].strip(), 'group': row[group_index].strip()}
+                for row in reader if row
+            ]
     except FileNotFoundError:
         print(f"Error: CSV file not found: {csv_path}")
         sys.exit(1)
-    except KeyError as e:
+    except ValueError as e:
         print(f"Error: Missing column in CSV: {e}")
         print("CSV must have columns: participant_id, group")
         sys.exit(1)
+    except IndexError:
+        print("Error: CSV row has fewer columns than the header")
+        sys.exit(1)
     
     return participants
 
@@ -120,23 +130,21 @@ def interactive_input():
 
 def validate_participants(new_participants, existing_ids, existing_groups):
     """Validate new participants data"""
-    errors = []
+    counts = Counter(participant['id'] for participant in new_participants)
     
-    for participant in new_participants:
-        pid = participant['id']
-        group = participant['group']
-        
-        # Check for duplicates
-        if pid in existing_ids:
-            errors.append(f"Participant {pid} already exists in seed file")
-        
-        # Check participant ID format (optional)
+    # Check for duplicates, both against the seed file and within the new batch
+    errors = [f"Participant {pid} already exists in seed file" for pid in counts if pid in existing_ids]
+    errors += [f"Participant {pid} is listed {count} times" for pid, count in counts.items() if count > 1]
+    
+    # Check participant ID format (optional)
+    for pid in counts:
         if not pid.startswith('FOD'):
             print(f"Warning: {pid} doesn't follow FOD### format")
-        
-        # Check if group exists
-        if group not in existing_groups:
-            print(f"Warning: Group '{group}' doesn't exist in seed file. You may need to add it manually.")
+    
+    # Check if groups exist
+    unknown_groups = {participant['group'] for participant in new_participants} - existing_groups
+    for group in sorted(unknown_groups):
+        print(f"Warning: Group '{group}' doesn't exist in seed file. You may need to add it manually.")
     
     if errors:
         print("Validation errors:")
@@ -169,16 +177,32 @@ def save_seed_file(seed_data, seed_file_path, backup=True):
     if backup:
         backup_path = f"{seed_file_path}.backup"
         print(f"Creating backup: {backup_path}")
-        with open(seed_file_path, 'r') as original:
-            with open(backup_path, 'w') as backup_file:
-                backup_file.write(original.read())
+        if os.path.exists(backup_path):
+            os.remove(backup_path)
+        # The seed file is replaced rather than rewritten below, so a hardlink
+        # keeps the old contents without copying them
+        try:
+            os.link(seed_file_path, backup_path)
+        except OSError:
+            shutil.copyfile(seed_file_path, backup_path)
     
+    # Write to a temporary file and rename it over the original so a failed
+    # write never leaves a truncated seed file behind
+    tmp_path = f"{seed_file_path}.tmp"
     try:
-        with open(seed_file_path, 'w') as f:
-            yaml.dump(seed_data, f, default_flow_style=False, sort_keys=False, 
-                     allow_unicode=True, width=float('inf'))
+        with open(tmp_path, 'w') as f:
+            # Dump one top-level section at a time so only that section's node tree
+            # is held in memory; the block mappings concatenate into one document.
+            # The C emitter needs an integer width, so use a large one to avoid wrapping
+            for key, value in seed_data.items():
+                yaml.dump({key: value}, f, Dumper=Dumper, default_flow_style=False, sort_keys=False,
+                         allow_unicode=True, width=2**31 - 1)
+        shutil.copymode(seed_file_path, tmp_path)
+        os.replace(tmp_path, seed_file_path)
         print(f"Updated seed file: {seed_file_path}")
     except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         print(f"Error saving seed file: {e}")
         sys.exit(1)
 
@@ -18,21 +18,45 @@ Usage:
 
 
 import argparse
-import csv
+from collections import defaultdict
 from datetime import datetime
+import io
+from itertools import chain
+import os
 from pathlib import Path
 import secrets
 import string
 import sys
 
-import yaml
+# Default output directory for generated seed files
+DEFAULT_SEED_DIR = Path(__file__).resolve().parent.parent / 'config' / 'seed-data'
+
+PASSWORD_ALPHABET = string.ascii_letters + string.digits + "!@#$%^&*"
+
+# Column names of the CSV schema; a first row naming either column is a header
+CSV_HEADER_NAMES = ('participant_id', 'group')
+
+# Group counts above which print_summary only lists the first few groups
+SUMMARY_MAX_GROUPS = 20
+SUMMARY_PREVIEW_GROUPS = 5
+
+# Participant count above which seed files are written by format_flat_seed_yaml
+FLAT_YAML_THRESHOLD = 500
 
 
 def generate_password(length=12):
     """Generate a secure random password"""
-    alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
-    password = ''.join(secrets.choice(alphabet) for _ in range(length))
-    return password
+    randbelow = secrets.randbelow
+    alphabet = PASSWORD_ALPHABET
+    alphabet_size = len(alphabet)
+    return ''.join(alphabet[randbelow(alphabet_size)] for _ in range(length))
+
+
+def generate_passwords(count, length=12):
+    """Generate several secure random URL-safe passwords with a single entropy read"""
+    # Each base64 character carries 6 uniform bits, so slicing keeps every password unbiased
+    token = secrets.token_urlsafe(count * length)
+    return [token[i:i + length] for i in range(0, count * length, length)]
 
 
 def generate_admin_password(length=16):
@@ -40,16 +64,20 @@ def generate_admin_password(length=16):
     return generate_password(length)
 
 
-def scan_csv_file(csv_path):
+def scan_csv_file(csv_path, has_header=True):
     """
     Read participants and groups from CSV file
     
     Args:
         csv_path (str): Path to CSV file with columns: participant_id, group
+        has_header (bool): Whether the first row may be a header; it is only
+            skipped if its columns are named participant_id or group
         
     Returns:
         dict: Dictionary with groups and their participants
     """
+    import csv  # Imported here so directory scans and --help don't pay for it
+    
     csv_file = Path(csv_path)
     
     if not csv_file.exists():
@@ -57,27 +85,28 @@ def scan_csv_file(csv_path):
     
     structure = {}
     
+    # Skipped rows are tallied per reason and reported once after reading
+    skipped_rows = {'insufficient columns': [], 'empty values': [], 'duplicate participants': []}
+    
     try:
-        with open(csv_file, 'r', newline='', encoding='utf-8') as file:
-            # Try to detect if there's a header
-            sample = file.read(1024)
-            file.seek(0)
-            
-            # Check if first line looks like a header
-            sniffer = csv.Sniffer()
-            has_header = sniffer.has_header(sample)
-            
+        # utf-8-sig drops the byte order mark Excel puts in front of the header
+        with open(csv_file, 'r', newline='', encoding='utf-8-sig') as file:
             reader = csv.reader(file)
             
-            # Skip header if present
-            if has_header:
-                header = next(reader)
-                print(f"📋 Detected CSV header: {header}")
+            # Skip header if present, otherwise put the first row back
+            first_row = next(reader, None)
+            if has_header and first_row and is_csv_header(first_row):
+                print(f"📋 Detected CSV header: {first_row}")
+                start = 2
+            else:
+                if first_row is not None:
+                    reader = chain([first_row], reader)
+                start = 1
             
             # Read participant data
-            for row_num, row in enumerate(reader, start=2 if has_header else 1):
+            for row_num, row in enumerate(reader, start=start):
                 if len(row) < 2:
-                    print(f"Warning: Row {row_num} has insufficient columns, skipping: {row}")
+                    skipped_rows['insufficient columns'].append(row_num)
                     continue
                 
                 # Strip whitespace from values
@@ -86,22 +115,33 @@ def scan_csv_file(csv_path):
                 
                 # Skip empty rows
                 if not participant_id or not group_name:
-                    print(f"Warning: Row {row_num} has empty values, skipping: {row}")
+                    skipped_rows['empty values'].append(row_num)
                     continue
                 
-                # Add to structure
-                if group_name not in structure:
-                    structure[group_name] = []
-                
-                if participant_id not in structure[group_name]:
-                    structure[group_name].append(participant_id)
+                # Add to structure; each group is a dict used as an insertion-ordered
+                # set so the duplicate check is O(1) rather than a list scan
+                group_participants = structure.setdefault(group_name, {})
+                if participant_id not in group_participants:
+                    group_participants[participant_id] = None
                 else:
-                    print(f"Warning: Duplicate participant '{participant_id}' in group '{group_name}', skipping")
+                    skipped_rows['duplicate participants'].append(row_num)
     
     except Exception as e:
         raise Exception(f"Error reading CSV file: {e}")
     
-    return structure
+    for reason, row_nums in skipped_rows.items():
+        if row_nums:
+            sample = ', '.join(str(row_num) for row_num in row_nums[:10])
+            if len(row_nums) > 10:
+                sample += ', ...'
+            print(f"Warning: Skipped {len(row_nums)} row(s) with {reason} (rows {sample})")
+    
+    return {group_name: list(participants) for group_name, participants in structure.items()}
+
+
+def is_csv_header(row):
+    """Check whether a CSV row names the participant_id or group column"""
+    return any(value.strip().lower() == name for value, name in zip(row, CSV_HEADER_NAMES))
 
 
 def scan_directory_structure(root_path):
@@ -124,26 +164,24 @@ def scan_directory_structure(root_path):
     
     structure = {}
     
-    # Get all subdirectories in root (these are groups)
-    for group_path in root.iterdir():
-        if not group_path.is_dir():
-            continue  # Skip files
-            
-        group_name = group_path.name
-        participants = []
-        
-        # Get all subdirectories in group (these are participants)
-        for participant_path in group_path.iterdir():
-            if not participant_path.is_dir():
-                continue  # Skip files
-                
-            participant_name = participant_path.name
-            participants.append(participant_name)
+    def warn_unreadable(error):
+        print(f"Warning: Cannot read directory '{error.filename}', skipping...")
+    
+    # Walk at most two levels: the root lists the groups, each group lists its
+    # participants. Clearing dirnames at the group level stops the walk there,
+    # so following symlinked group folders stays bounded
+    walker = os.walk(root_path, topdown=True, onerror=warn_unreadable, followlinks=True)
+    next(walker, None)  # The root itself
+    
+    for group_path, participant_names, _ in walker:
+        group_name = os.path.basename(group_path)
         
-        if participants:  # Only add groups that have participants
-            structure[group_name] = participants
+        if participant_names:  # Only add groups that have participants
+            structure[group_name] = list(participant_names)
         else:
             print(f"Warning: Group '{group_name}' has no participants, skipping...")
+        
+        participant_names[:] = []
     
     return structure
 
@@ -160,7 +198,7 @@ def parse_input_source(args):
     """
     if args.csv:
         print(f"📊 Reading participants from CSV file: {args.csv}")
-        return scan_csv_file(args.csv)
+        return scan_csv_file(args.csv, args.csv_header)
     elif args.directory:
         print(f"📁 Scanning directory structure: {args.directory}")
         return scan_directory_structure(args.directory)
@@ -169,7 +207,7 @@ def parse_input_source(args):
         raise ValueError("No input source specified")
 
 
-def create_seed_config(campaign_name, directory_structure, admin_username="admin"):
+def create_seed_config(campaign_name, directory_structure, admin_username="admin", data_days=60):
     """
     Create the seed configuration dictionary
     
@@ -177,6 +215,8 @@ def create_seed_config(campaign_name, directory_structure, admin_username="admin
         campaign_name (str): Name of the campaign (e.g., 'campaign_2024')
         directory_structure (dict): Groups and participants from scanning
         admin_username (str): Username for the admin user
+        data_days (int): Days of sample data per participant; only written
+            to the config when it differs from the default of 60
         
     Returns:
         dict: Complete seed configuration
@@ -200,31 +240,33 @@ def create_seed_config(campaign_name, directory_structure, admin_username="admin
         'participants': []
     }
     
-    # Add groups
-    for group_name in directory_structure.keys():
-        group_config = {
+    add_group = config['groups'].append
+    add_supervisor = config['supervisors'].append
+    add_participant = config['participants'].append
+    
+    # Add groups and their supervisors in a single pass
+    supervisor_passwords = generate_passwords(len(directory_structure))
+    for group_name, supervisor_password in zip(directory_structure.keys(), supervisor_passwords):
+        add_group({
             'name': group_name,
             'description': f'Participant group for {group_name} in {campaign_name}',
             'created_by': admin_username
-        }
-        config['groups'].append(group_config)
-
-    # Add supervisors
-    for group_name in directory_structure.keys():
-        supervisor_config = {
+        })
+        add_supervisor({
             'username': f'supervisor_{group_name.lower()}',
-            'password': generate_password(),
+            'password': supervisor_password,
             'groups': group_name,  # Single group assignment
             'role': 'supervisor',
             'generate_data': False,
-        }
-        config['supervisors'].append(supervisor_config)
+        })
     
     # Add participants
+    participant_passwords = iter(generate_passwords(
+        sum(len(participants) for participants in directory_structure.values())
+    ))
     for group_name, participants in directory_structure.items():
         for participant_name in participants:
-            # Generate participant password
-            participant_password = generate_password()
+            participant_password = next(participant_passwords)
             
             participant_config = {
                 'username': participant_name,
@@ -232,11 +274,68 @@ def create_seed_config(campaign_name, directory_structure, admin_username="admin
                 'groups': group_name,  # Single group assignment
                 'generate_data': False,
             }
-            config['participants'].append(participant_config)
+            if data_days != 60:
+                participant_config['data_days'] = data_days
+            add_participant(participant_config)
     
     return config
 
 
+def format_flat_seed_yaml(config):
+    """
+    Format a seed configuration as YAML without going through the generic emitter
+    
+    create_seed_config always produces the same flat shape: top-level keys holding
+    either an empty mapping or a list of mappings of scalars. Strings are always
+    single-quoted so values such as 'yes', '123' or passwords with symbols keep
+    their type.
+    
+    Args:
+        config (dict): The seed configuration
+        
+    Returns:
+        str: The YAML document, or None if the configuration has a different shape
+    """
+    def format_scalar(value):
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, int):
+            return str(value)
+        if value is None:
+            return 'null'
+        if isinstance(value, str) and value.isprintable():
+            return "'" + value.replace("'", "''") + "'"
+        raise ValueError(value)
+    
+    lines = []
+    append = lines.append
+    try:
+        for key, value in config.items():
+            if not key.isidentifier():
+                return None
+            if value == {}:
+                append(f'{key}: {{}}')
+                continue
+            if not isinstance(value, list):
+                return None
+            
+            append(f'{key}:' if value else f'{key}: []')
+            for item in value:
+                if not item:
+                    return None
+                prefix = '- '
+                for field, field_value in item.items():
+                    if not field.isidentifier():
+                        return None
+                    append(f'{prefix}{field}: {format_scalar(field_value)}')
+                    prefix = '  '
+    except (AttributeError, ValueError):
+        return None
+    
+    lines.append('')
+    return '\n'.join(lines)
+
+
 def save_seed_config(config, output_path):
     """
     Save the seed configuration to a YAML file
@@ -264,9 +363,29 @@ def save_seed_config(config, output_path):
 # Structure generated from directory scan:
 """
     
-    with open(output_file, 'w') as f:
-        f.write(header_comment)
-        yaml.dump(config, f, default_flow_style=False, indent=2, sort_keys=False)
+    # Build the whole document in memory first
+    buffer = io.StringIO()
+    buffer.write(header_comment)
+    
+    # Large campaigns skip the generic emitter when the shape allows it
+    flat_yaml = None
+    if len(config.get('participants', [])) > FLAT_YAML_THRESHOLD:
+        flat_yaml = format_flat_seed_yaml(config)
+    
+    if flat_yaml is not None:
+        buffer.write(flat_yaml)
+    else:
+        import yaml  # Imported here so --help, dry runs and the flat emitter don't pay for it
+        
+        # Prefer the libyaml C emitter when PyYAML was built against it
+        Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+        yaml.dump(config, buffer, Dumper=Dumper, default_flow_style=False, indent=2, sort_keys=False)
+    
+    # Write it in one go to a temporary file and rename it into place, so an
+    # interrupted run never leaves a partial seed file behind
+    tmp_file = output_file.with_name(f'{output_file.name}.tmp')
+    tmp_file.write_text(buffer.getvalue(), encoding='utf-8')
+    os.replace(tmp_file, output_file)
     
     print(f"✓ Seed configuration saved to: {output_file}")
 
@@ -286,15 +405,27 @@ def print_summary(config, campaign_name):
     for admin in config['admins']:
         print(f"   Admin '{admin['username']}': {admin['password']}")
     
+    # Index participants by group in a single pass
+    participants_by_group = defaultdict(list)
+    for participant in config['participants']:
+        participants_by_group[participant['groups']].append(participant['username'])
+    
+    # Large campaigns only list the first few groups
+    listed_groups = config['groups']
+    if total_groups > SUMMARY_MAX_GROUPS:
+        listed_groups = listed_groups[:SUMMARY_PREVIEW_GROUPS]
+    
     print("\n📁 Group Structure:")
-    for group in config['groups']:
+    for group in listed_groups:
         group_name = group['name']
-        group_participants = [p['username'] for p in config['participants'] if p['groups'] == group_name]
+        group_participants = participants_by_group[group_name]
         print(f"   📂 {group_name} ({len(group_participants)} participants)")
         for participant in group_participants[:3]:  # Show first 3 participants
             print(f"      └── {participant}")
         if len(group_participants) > 3:
             print(f"      └── ... and {len(group_participants) - 3} more")
+    if total_groups > len(listed_groups):
+        print(f"   ... and {total_groups - len(listed_groups)} more groups")
     
     print("\n⚠️  SECURITY REMINDER:")
     print("   • Change the admin password before production use")
@@ -368,6 +499,19 @@ Examples:
         default=60
     )
     
+    parser.add_argument(
+        '--csv-header',
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help='Skip a first CSV row naming the participant_id or group column (default: on)'
+    )
+    
+    parser.add_argument(
+        '--quiet', '-q',
+        action='store_true',
+        help='Skip the configuration summary'
+    )
+    
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -377,14 +521,8 @@ Examples:
     args = parser.parse_args()
     
     try:
-        # Determine output path
-        if args.output:
-            output_path = args.output
-        else:
-            # Default to config/seed-data directory
-            script_dir = Path(__file__).parent
-            config_dir = script_dir.parent / 'config' / 'seed-data'
-            output_path = config_dir / f'{args.campaign_name}_seed.yml'
+        # Determine output path, defaulting to the config/seed-data directory
+        output_path = args.output or DEFAULT_SEED_DIR / f'{args.campaign_name}_seed.yml'
         
         # Parse input source and get directory structure
         directory_structure = parse_input_source(args)
@@ -400,16 +538,13 @@ Examples:
         config = create_seed_config(
             args.campaign_name, 
             directory_structure, 
-            args.admin_user
+            args.admin_user,
+            args.data_days
         )
         
-        # Update data_days if specified
-        if args.data_days != 60:
-            for participant in config['participants']:
-                participant['data_days'] = args.data_days
-        
         # Print summary
-        print_summary(config, args.campaign_name)
+        if not args.quiet:
+            print_summary(config, args.campaign_name)
         
         if args.dry_run:
             print(f"\n🔍 DRY RUN - Configuration would be saved to: {output_path}")
@@ -8,6 +8,22 @@ from typing import List, Dict, Any
 from sqlalchemy import text
 import yaml
 
+# Prefer the libyaml C parser when PyYAML was built against it
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Built once at import; add_excluded_day runs once per day in the pattern helpers
+ADD_EXCLUDED_DAY_QUERY = text("""
+    INSERT INTO excluded_days (group_id, date, reason)
+    VALUES (:group_id, :date, :reason)
+    ON CONFLICT (group_id, date) 
+    DO UPDATE SET reason = :reason
+""")
+
+REMOVE_EXCLUDED_DAY_QUERY = text("""
+    DELETE FROM excluded_days 
+    WHERE group_id = :group_id AND date = :date
+""")
+
 
 def add_excluded_day(engine, group_id: int, date, reason: str = "No data expected") -> bool:
     """
@@ -22,17 +38,9 @@ def add_excluded_day(engine, group_id: int, date, reason: str = "No data expecte
     Returns:
         bool: True if successful, False otherwise
     """
-    
-    query = text("""
-        INSERT INTO excluded_days (group_id, date, reason)
-        VALUES (:group_id, :date, :reason)
-        ON CONFLICT (group_id, date) 
-        DO UPDATE SET reason = :reason
-    """)
-    
     try:
         with engine.connect() as conn:
-            conn.execute(query, {
+            conn.execute(ADD_EXCLUDED_DAY_QUERY, {
                 "group_id": group_id,
                 "date": date,
                 "reason": reason
@@ -93,15 +101,9 @@ def remove_excluded_day(engine, group_id: int, date) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    
-    query = text("""
-        DELETE FROM excluded_days 
-        WHERE group_id = :group_id AND date = :date
-    """)
-    
     try:
         with engine.connect() as conn:
-            conn.execute(query, {
+            conn.execute(REMOVE_EXCLUDED_DAY_QUERY, {
                 "group_id": group_id,
                 "date": date
             })
@@ -175,7 +177,7 @@ def load_exclusion_config(config_file: str) -> Dict[str, Any]:
     
     try:
         with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=Loader)
         
         # Validate basic structure
         if not isinstance(config, dict):
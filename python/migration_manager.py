@@ -8,8 +8,6 @@ import os
 from pathlib import Path
 import sys
 
-from sqlalchemy import text
-
 def execute_migrations(engine, migration_path=None):
     """Execute migration files"""
     
@@ -42,12 +40,9 @@ def execute_migrations(engine, migration_path=None):
                 with open(migration_file, 'r') as f:
                     sql_content = f.read()
                 
-                # Split by semicolon and execute each statement
-                statements = [stmt.strip() for stmt in sql_content.split(';') if stmt.strip()]
-                
-                for statement in statements:
-                    if statement:
-                        conn.execute(text(statement))
+                # Run the file as one script; psycopg2 handles multiple statements
+                # (and dollar-quoted bodies) without splitting on ';'
+                conn.exec_driver_sql(sql_content, execution_options={'no_parameters': True})
                 
                 print(f"✓ Executed {filename}")
         
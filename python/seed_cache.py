@@ -0,0 +1,87 @@
+"""
+Parsed YAML cache shared by the scripts that load seed files
+"""
+
+import os
+import pickle
+from stat import S_ISREG
+
+import yaml
+
+# Prefer the libyaml C parser when PyYAML was built against it
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# The on-disk sidecar holds a copy of the seed file's plaintext passwords, so
+# it is only used when this variable is set to 1
+SEED_CACHE_ENV = 'FITONDUTY_SEED_CACHE'
+
+
+def load_seed_yaml(seed_file_path):
+    """
+    Parse a seed YAML file, reusing a pickled copy while the file is unchanged
+
+    With FITONDUTY_SEED_CACHE=1, the parsed document is stored next to the
+    seed file as '<seed_file>.cache.pkl' (mode 0600) together with the seed
+    file's mtime and size, so consecutive scripts in a pipeline only pay for
+    the YAML parse once.
+
+    Args:
+        seed_file_path: Path to the seed YAML file
+
+    Returns:
+        The parsed seed document
+    """
+    stat = os.stat(seed_file_path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cache_path = f"{seed_file_path}.cache.pkl"
+
+    use_sidecar = os.environ.get(SEED_CACHE_ENV) == '1'
+    if use_sidecar:
+        try:
+            with open(cache_path, 'rb') as f:
+                # Unpickling runs code, so only trust a cache that nobody but the
+                # seed file's owner could have written
+                if not is_trusted_cache(os.fstat(f.fileno()), stat.st_uid):
+                    raise ValueError(f"untrusted cache file {cache_path}")
+                blob = f.read()
+            cached_key, seed_data = pickle.loads(blob)
+            if cached_key == key:
+                return seed_data
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            pass  # Missing, unreadable or untrusted cache, fall back to parsing
+
+    with open(seed_file_path, 'r') as f:
+        seed_data = yaml.load(f, Loader=Loader)
+    if not use_sidecar:
+        return seed_data
+
+    # The cache holds the same credentials as the seed file, so only its owner
+    # may read it
+    tmp_path = f"{cache_path}.tmp"
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump((key, seed_data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return seed_data
+
+
+def is_trusted_cache(cache_stat, owner_uid):
+    """
+    Check that a cache file is safe to unpickle
+    
+    Args:
+        cache_stat: os.stat_result of the open cache file
+        owner_uid: User ID the cache file must belong to
+        
+    Returns:
+        bool: True if the cache is a regular file owned by owner_uid and not
+        writable by group or others
+    """
+    return (S_ISREG(cache_stat.st_mode)
+            and cache_stat.st_uid == owner_uid
+            and not cache_stat.st_mode & 0o022)